@@ -3,7 +3,9 @@ Stability AI model definitions and parameter validation.
 """
 
 from enum import Enum
-from typing import Dict, List, Optional, Union
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
 from dataclasses import dataclass
 
 
@@ -42,12 +44,22 @@ class OutputFormat(Enum):
     PNG = "png"
 
 
-@dataclass
+class Endpoint(str, Enum):
+    """Stability AI generation endpoints."""
+    CORE = "/v2beta/stable-image/generate/core"
+    ULTRA = "/v2beta/stable-image/generate/ultra"
+    SD3 = "/v2beta/stable-image/generate/sd3"
+
+
+ParamBuilder = Callable[..., Dict[str, Any]]
+
+
+@dataclass(slots=True, frozen=True)
 class ModelInfo:
     """Information about a specific model."""
     name: str
     description: str
-    endpoint: str
+    endpoint: Endpoint
     supports_negative_prompt: bool
     supports_image_to_image: bool
     supports_strength: bool
@@ -59,7 +71,7 @@ MODEL_INFO: Dict[StabilityModel, ModelInfo] = {
     StabilityModel.CORE: ModelInfo(
         name="Stable Image Core",
         description="Fast, affordable, natural language optimized. Best for everyday use.",
-        endpoint="/v2beta/stable-image/generate/core",
+        endpoint=Endpoint.CORE,
         supports_negative_prompt=True,
         supports_image_to_image=True,
         supports_strength=True
@@ -68,7 +80,7 @@ MODEL_INFO: Dict[StabilityModel, ModelInfo] = {
     StabilityModel.ULTRA: ModelInfo(
         name="Stable Image Ultra", 
         description="Highest quality results. State-of-the-art, SD3.5-based. Use for important or complex images.",
-        endpoint="/v2beta/stable-image/generate/ultra",
+        endpoint=Endpoint.ULTRA,
         supports_negative_prompt=True,
         supports_image_to_image=True,
         supports_strength=True
@@ -77,7 +89,7 @@ MODEL_INFO: Dict[StabilityModel, ModelInfo] = {
     StabilityModel.SD3_5_LARGE: ModelInfo(
         name="SD3.5 Large",
         description="8B parameter model. Maximum control and detail. Good for technical or artistic work.",
-        endpoint="/v2beta/stable-image/generate/sd3",
+        endpoint=Endpoint.SD3,
         supports_negative_prompt=True,
         supports_image_to_image=True,
         supports_strength=True
@@ -86,7 +98,7 @@ MODEL_INFO: Dict[StabilityModel, ModelInfo] = {
     StabilityModel.SD3_5_LARGE_TURBO: ModelInfo(
         name="SD3.5 Large Turbo",
         description="Distilled faster version of SD3.5 Large. Good balance of quality and speed.",
-        endpoint="/v2beta/stable-image/generate/sd3",
+        endpoint=Endpoint.SD3,
         supports_negative_prompt=True,
         supports_image_to_image=True,
         supports_strength=True
@@ -95,7 +107,7 @@ MODEL_INFO: Dict[StabilityModel, ModelInfo] = {
     StabilityModel.SD3_5_MEDIUM: ModelInfo(
         name="SD3.5 Medium",
         description="2B parameter model. Efficient and fast with good quality.",
-        endpoint="/v2beta/stable-image/generate/sd3",
+        endpoint=Endpoint.SD3,
         supports_negative_prompt=True,
         supports_image_to_image=True,
         supports_strength=True
@@ -104,7 +116,7 @@ MODEL_INFO: Dict[StabilityModel, ModelInfo] = {
     StabilityModel.SD3_5_FLASH: ModelInfo(
         name="SD3.5 Flash",
         description="Ultra-fast 4-step generation. Fastest generation, good for rapid iteration and previews.",
-        endpoint="/v2beta/stable-image/generate/sd3",
+        endpoint=Endpoint.SD3,
         supports_negative_prompt=False,
         supports_image_to_image=True,
         supports_strength=True
@@ -112,32 +124,112 @@ MODEL_INFO: Dict[StabilityModel, ModelInfo] = {
 }
 
 
+def _make_param_builders(
+    model: StabilityModel,
+    model_info: ModelInfo
+) -> Tuple[ParamBuilder, ParamBuilder]:
+    """
+    Create text-to-image and image-to-image parameter builders for one model.
+    
+    Endpoint-specific fields are resolved here once so each request only
+    fills in its own values.
+    """
+    if model_info.endpoint is Endpoint.SD3:
+        text_to_image_extra = {"model": model.value, "mode": "text-to-image"}
+        image_to_image_extra = {"model": model.value, "mode": "image-to-image"}
+    else:
+        text_to_image_extra = {}
+        image_to_image_extra = {}
+    
+    supports_negative_prompt = model_info.supports_negative_prompt
+    supports_strength = model_info.supports_strength
+    
+    def build_text_to_image_params(
+        prompt: str,
+        aspect_ratio: str,
+        seed: int,
+        output_format: str,
+        negative_prompt: str = ""
+    ) -> Dict[str, Any]:
+        params = {
+            "prompt": prompt,
+            "aspect_ratio": aspect_ratio,
+            "seed": seed,
+            "output_format": output_format,
+            **text_to_image_extra
+        }
+        if negative_prompt and supports_negative_prompt:
+            params["negative_prompt"] = negative_prompt
+        return params
+    
+    def build_image_to_image_params(
+        prompt: str,
+        strength: float,
+        seed: int,
+        output_format: str,
+        negative_prompt: str = ""
+    ) -> Dict[str, Any]:
+        params = {
+            "prompt": prompt,
+            "seed": seed,
+            "output_format": output_format
+        }
+        if supports_strength:
+            params["strength"] = strength
+        params.update(image_to_image_extra)
+        if negative_prompt and supports_negative_prompt:
+            params["negative_prompt"] = negative_prompt
+        return params
+    
+    return build_text_to_image_params, build_image_to_image_params
+
+
+# Lookup tables derived from the enums above, built once at import
+_MODEL_BY_NAME: Dict[str, StabilityModel] = {m.value: m for m in StabilityModel}
+_MODEL_INFO_BY_NAME: Dict[str, ModelInfo] = {m.value: MODEL_INFO[m] for m in StabilityModel}
+# (text-to-image, image-to-image) request parameter builders per model name
+_PARAM_BUILDERS: Dict[str, Tuple[ParamBuilder, ParamBuilder]] = {
+    m.value: _make_param_builders(m, MODEL_INFO[m]) for m in StabilityModel
+}
+_AVAILABLE_MODELS: Dict[str, str] = {m.value: MODEL_INFO[m].description for m in StabilityModel}
+_AVAILABLE_MODELS_VIEW: Mapping[str, str] = MappingProxyType(_AVAILABLE_MODELS)
+_VALID_ASPECT_RATIOS = frozenset(r.value for r in AspectRatio)
+_VALID_OUTPUT_FORMATS = frozenset(f.value for f in OutputFormat)
+
+# Comma-separated value lists used in validation error messages
+_MODELS_CSV = ", ".join(m.value for m in StabilityModel)
+_RATIOS_CSV = ", ".join(r.value for r in AspectRatio)
+_FORMATS_CSV = ", ".join(f.value for f in OutputFormat)
+
+
 def get_model_by_name(model_name: str) -> Optional[StabilityModel]:
     """Get model enum by string name."""
-    for model in StabilityModel:
-        if model.value == model_name:
-            return model
-    return None
+    return _MODEL_BY_NAME.get(model_name)
+
 
+def get_model_info(model_name: str) -> Optional[ModelInfo]:
+    """Get model info by string name."""
+    return _MODEL_INFO_BY_NAME.get(model_name)
 
-def get_available_models() -> Dict[str, str]:
-    """Get dictionary of available models and their descriptions."""
-    return {
-        model.value: MODEL_INFO[model].description 
-        for model in StabilityModel
-    }
+
+def get_param_builders(model_name: str) -> Optional[Tuple[ParamBuilder, ParamBuilder]]:
+    """Get the (text-to-image, image-to-image) parameter builders for a model name."""
+    return _PARAM_BUILDERS.get(model_name)
+
+
+def get_available_models() -> Mapping[str, str]:
+    """Get read-only mapping of available models and their descriptions."""
+    return _AVAILABLE_MODELS_VIEW
 
 
 def validate_aspect_ratio(aspect_ratio: str) -> bool:
     """Validate aspect ratio string."""
-    valid_ratios = [ratio.value for ratio in AspectRatio]
-    return aspect_ratio in valid_ratios
+    return isinstance(aspect_ratio, str) and aspect_ratio in _VALID_ASPECT_RATIOS
 
 
 def validate_output_format(output_format: str) -> bool:
     """Validate output format string."""
-    valid_formats = [format.value for format in OutputFormat]
-    return output_format in valid_formats
+    return isinstance(output_format, str) and output_format in _VALID_OUTPUT_FORMATS
 
 
 def validate_seed(seed: int) -> bool:
@@ -150,56 +242,131 @@ def validate_strength(strength: float) -> bool:
     return 0.0 <= strength <= 1.0
 
 
-def get_model_validation_errors(
-    model_name: str,
-    aspect_ratio: str,
-    output_format: str,
+def _range_errors(
+    model: StabilityModel,
     seed: int,
-    strength: Optional[float] = None,
-    negative_prompt: Optional[str] = None,
-    image_path: Optional[str] = None
+    strength: Optional[float],
+    has_image: bool
 ) -> List[str]:
-    """Validate all parameters for a model and return list of errors."""
+    """Check per-request numeric parameters against their allowed ranges."""
     errors = []
     
-    # Validate model
-    model = get_model_by_name(model_name)
-    if not model:
-        available = ", ".join([m.value for m in StabilityModel])
-        errors.append(f"Invalid model '{model_name}'. Available models: {available}")
-        return errors  # Can't validate further without valid model
-    
-    model_info = MODEL_INFO[model]
-    
-    # Validate aspect ratio
-    if not validate_aspect_ratio(aspect_ratio):
-        valid_ratios = ", ".join([r.value for r in AspectRatio])
-        errors.append(f"Invalid aspect ratio '{aspect_ratio}'. Valid ratios: {valid_ratios}")
-    
-    # Validate output format
-    if not validate_output_format(output_format):
-        valid_formats = ", ".join([f.value for f in OutputFormat])
-        errors.append(f"Invalid output format '{output_format}'. Valid formats: {valid_formats}")
-    
     # Validate seed
     if not validate_seed(seed):
         errors.append(f"Invalid seed '{seed}'. Must be between 0 and 4294967294")
     
     # Validate strength for image-to-image
-    if image_path and strength is not None:
-        if not model_info.supports_strength:
-            errors.append(f"Model '{model_name}' does not support strength parameter")
+    if has_image and strength is not None:
+        if not MODEL_INFO[model].supports_strength:
+            errors.append(f"Model '{model.value}' does not support strength parameter")
         elif not validate_strength(strength):
             errors.append(f"Invalid strength '{strength}'. Must be between 0.0 and 1.0")
     
+    return errors
+
+
+def _capability_errors(
+    model: StabilityModel,
+    has_negative_prompt: bool,
+    has_image: bool
+) -> List[str]:
+    """Check requested features against what the model supports."""
+    errors = []
+    model_info = MODEL_INFO[model]
+    
     # Validate negative prompt support
-    if negative_prompt and not model_info.supports_negative_prompt:
-        errors.append(f"Model '{model_name}' does not support negative prompts")
+    if has_negative_prompt and not model_info.supports_negative_prompt:
+        errors.append(f"Model '{model.value}' does not support negative prompts")
     
     # Validate image-to-image support
-    if image_path and not model_info.supports_image_to_image:
-        errors.append(f"Model '{model_name}' does not support image-to-image generation")
+    if has_image and not model_info.supports_image_to_image:
+        errors.append(f"Model '{model.value}' does not support image-to-image generation")
+    
+    return errors
+
+
+@lru_cache(maxsize=256)
+def _validate_static(
+    model_name: str,
+    aspect_ratio: str,
+    output_format: str
+) -> Tuple[Optional[StabilityModel], Tuple[str, ...]]:
+    """
+    Validate the parameters that repeat across requests; results are cached.
+    
+    Returns:
+        Tuple: (resolved model or None, validation errors)
+    """
+    # Validate model
+    model = get_model_by_name(model_name) if isinstance(model_name, str) else None
+    if model is None:
+        # Can't validate further without valid model
+        return None, (f"Invalid model '{model_name}'. Available models: {_MODELS_CSV}",)
+    
+    errors = []
+    
+    # Validate aspect ratio
+    if not validate_aspect_ratio(aspect_ratio):
+        errors.append(f"Invalid aspect ratio '{aspect_ratio}'. Valid ratios: {_RATIOS_CSV}")
+    
+    # Validate output format
+    if not validate_output_format(output_format):
+        errors.append(f"Invalid output format '{output_format}'. Valid formats: {_FORMATS_CSV}")
+    
+    return model, tuple(errors)
+
+
+def get_model_validation_errors_typed(
+    model: StabilityModel,
+    seed: int,
+    strength: Optional[float] = None,
+    negative_prompt: Optional[str] = None,
+    image_path: Optional[str] = None
+) -> List[str]:
+    """
+    Validate parameters for an already-resolved model and return list of errors.
+    
+    Aspect ratio and output format are not checked here since enum-typed
+    values are valid by construction; only ranges and model capabilities are.
+    """
+    has_image = bool(image_path)
+    errors = _range_errors(model, seed, strength, has_image)
+    errors.extend(_capability_errors(model, bool(negative_prompt), has_image))
+    return errors
+
+
+def get_model_validation_errors(
+    model_name: str,
+    aspect_ratio: str,
+    output_format: str,
+    seed: int,
+    strength: Optional[float] = None,
+    negative_prompt: Optional[str] = None,
+    image_path: Optional[str] = None
+) -> List[str]:
+    """Validate all parameters for a model and return list of errors."""
+    # Raw tool arguments may be any JSON value; only strings are used as cache keys
+    if (
+        isinstance(model_name, str)
+        and isinstance(aspect_ratio, str)
+        and isinstance(output_format, str)
+    ):
+        model, static_errors = _validate_static(model_name, aspect_ratio, output_format)
+    else:
+        model, static_errors = _validate_static.__wrapped__(model_name, aspect_ratio, output_format)
+    
+    errors = list(static_errors)
+    if model is None:
+        return errors
     
+    # The remaining checks only depend on the resolved model
+    errors.extend(get_model_validation_errors_typed(
+        model,
+        seed,
+        strength=strength,
+        negative_prompt=negative_prompt,
+        image_path=image_path
+    ))
     return errors
 
 
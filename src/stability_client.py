@@ -2,21 +2,246 @@
 Stability AI API client with support for multiple endpoints.
 """
 
+import asyncio
+import io
 import os
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple, Union
 from pathlib import Path
 from dataclasses import dataclass
 
 import httpx
-from PIL import Image as PILImage
 
-from .models import StabilityModel, MODEL_INFO, get_model_by_name
+from .models import Endpoint, get_model_info, get_param_builders
 from .utils import StorageError
 
 
 logger = logging.getLogger(__name__)
 
+# Placeholder file that forces a multipart body on text-to-image requests
+_EMPTY_FILES: Dict[str, str] = {"none": ""}
+
+# Size of response chunks read from the network
+_STREAM_CHUNK_SIZE = 65536
+
+# Response data collected before each write to a streaming writer, done in a worker thread
+_WRITE_BATCH_SIZE = 1024 * 1024
+
+# Longest prompt text written to the request log
+_MAX_LOGGED_TEXT = 200
+
+# Input images up to this size are uploaded from memory; larger ones are streamed from disk
+_INLINE_UPLOAD_LIMIT = 1024 * 1024
+
+# Bytes read from an input image to check its signature
+_SNIFF_HEADER_SIZE = 16
+
+# Size of each read from a large input image while streaming the upload
+_UPLOAD_CHUNK_SIZE = 65536
+
+# Contextual error messages for common HTTP failure codes
+_STATUS_MESSAGES: Dict[int, Callable[[httpx.Response], str]] = {
+    400: lambda r: f"Bad request: {r.text}. Please check your parameters.",
+    401: lambda r: "Invalid API key. Please check your STABILITY_API_KEY.",
+    402: lambda r: "Insufficient credits. Please check your Stability AI account balance.",
+    429: lambda r: "Rate limit exceeded. Please wait and try again.",
+}
+
+
+def _default_status_message(response: httpx.Response) -> str:
+    """Format an error message for status codes without a contextual message."""
+    return f"HTTP {response.status_code}: {response.text}"
+
+
+# Shared HTTP client, created on first use so connections are pooled across requests.
+# Pooled connections belong to the event loop they were opened on, so the loop is
+# remembered and the client rebuilt when called from a different one.
+_shared_client: Optional[httpx.AsyncClient] = None
+_shared_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Get the shared async HTTP client, creating it on first use.
+    
+    A new client is created if the previous one was closed or belongs to a
+    different event loop (e.g. after a second asyncio.run()).
+    
+    Returns:
+        httpx.AsyncClient: Pooled HTTP/2 client shared by all requests
+    """
+    global _shared_client, _shared_client_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    
+    if (
+        _shared_client is None
+        or _shared_client.is_closed
+        or _shared_client_loop is not loop
+    ):
+        # A client from a finished loop cannot be closed from this one; it is dropped
+        _shared_client_loop = loop
+        _shared_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=100,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(300.0, connect=10.0)  # 5 minutes, fail fast on connect
+        )
+    return _shared_client
+
+
+async def close_client() -> None:
+    """Close the shared async HTTP client if it was created."""
+    global _shared_client, _shared_client_loop
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+        _shared_client_loop = None
+
+
+def _loggable_params(params: Dict) -> Dict:
+    """Shorten long text parameters (e.g. prompts) for logging."""
+    return {
+        key: value[:_MAX_LOGGED_TEXT] + "..."
+        if isinstance(value, str) and len(value) > _MAX_LOGGED_TEXT else value
+        for key, value in params.items()
+    }
+
+
+def _sniff_image_type(header: bytes) -> Optional[str]:
+    """
+    Detect the image MIME type from the leading bytes of a file.
+    
+    Args:
+        header: First bytes of the file (at least 12)
+        
+    Returns:
+        Optional[str]: MIME type, or None if the signature is not recognised
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _open_upload_image(image_path: Path) -> Tuple[bytes, Union[bytes, BinaryIO]]:
+    """
+    Open an input image for upload (blocking; run in a worker thread).
+    
+    Args:
+        image_path: Path to the image file
+        
+    Returns:
+        Tuple: (header bytes, upload content). Small files are returned as
+        bytes; larger ones as an open binary file positioned at the start,
+        which the caller must close
+    """
+    image_file = open(image_path, "rb")
+    try:
+        header = image_file.read(_SNIFF_HEADER_SIZE)
+        if os.fstat(image_file.fileno()).st_size <= _INLINE_UPLOAD_LIMIT:
+            content = header + image_file.read()
+            image_file.close()
+            return header, content
+        image_file.seek(0)
+        return header, image_file
+    except BaseException:
+        image_file.close()
+        raise
+
+
+def _form_value(value: Any) -> str:
+    """Convert a form field value to text the same way httpx does."""
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return ""
+    return str(value)
+
+
+def _streaming_multipart(
+    data: Dict,
+    field_name: str,
+    filename: str,
+    mime_type: str,
+    upload_file: BinaryIO
+) -> Tuple[AsyncIterator[bytes], Dict[str, str]]:
+    """
+    Build a multipart/form-data body that streams a file from disk.
+    
+    httpx reads file objects synchronously while encoding multipart bodies,
+    so large uploads would block the event loop. Here the form fields and
+    file headers are encoded up front and the file is read in chunks in a
+    worker thread.
+    
+    Args:
+        data: Form fields sent before the file
+        field_name: Form field name of the file
+        filename: File name reported to the server
+        mime_type: Content type of the file
+        upload_file: Open binary file positioned at its start
+        
+    Returns:
+        Tuple: (async body iterator, Content-Type and Content-Length headers)
+    """
+    boundary = os.urandom(16).hex()
+    parts = []
+    for name, value in data.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+            + _form_value(value).encode()
+            + b"\r\n"
+        )
+    quoted_filename = filename.replace('"', "%22")
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{field_name}"; '
+        f'filename="{quoted_filename}"\r\nContent-Type: {mime_type}\r\n\r\n'.encode()
+    )
+    head = b"".join(parts)
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    file_size = os.fstat(upload_file.fileno()).st_size
+    
+    async def body() -> AsyncIterator[bytes]:
+        yield head
+        while True:
+            chunk = await asyncio.to_thread(upload_file.read, _UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+        yield tail
+    
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        "Content-Length": str(len(head) + file_size + len(tail))
+    }
+    return body(), headers
+
+
+def _verify_image(content: Union[bytes, BinaryIO]) -> None:
+    """Verify an input image with Pillow (blocking; run in a worker thread)."""
+    # Pillow is heavy to import and only needed for strict checks
+    from PIL import Image as PILImage
+    
+    if isinstance(content, bytes):
+        with PILImage.open(io.BytesIO(content)) as img:
+            img.verify()
+    else:
+        try:
+            with PILImage.open(content) as img:
+                img.verify()
+        finally:
+            content.seek(0)
+
 
 class StabilityAPIError(Exception):
     """Custom exception for Stability AI API errors."""
@@ -28,10 +253,10 @@ class StabilityAPIError(Exception):
         super().__init__(self.message)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GenerationResult:
     """Result of image generation."""
-    image_data: bytes
+    image_data: Union[bytes, memoryview]  # Read-only view over the response body
     seed: int
     finish_reason: str
     model: str
@@ -42,12 +267,20 @@ class GenerationResult:
 class StabilityClient:
     """Client for Stability AI API with multi-endpoint support."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        strict_validation: bool = False
+    ):
         """
         Initialize Stability AI client.
         
         Args:
             api_key: API key. If None, will try to get from STABILITY_API_KEY env var
+            client: HTTP client to use. If None, the shared module client is used
+            strict_validation: Also verify input images with Pillow, not just
+                their file signature
         """
         self.api_key = api_key or os.getenv("STABILITY_API_KEY")
         if not self.api_key:
@@ -56,43 +289,54 @@ class StabilityClient:
                 error_type="authentication_error"
             )
         
+        self.strict_validation = strict_validation
         self.base_url = "https://api.stability.ai"
         self.headers = {
             "Accept": "image/*",
             "Authorization": f"Bearer {self.api_key}"
         }
         
-        # Create async HTTP client with timeout
-        self.client = httpx.AsyncClient(
-            timeout=httpx.Timeout(300.0),  # 5 minutes timeout
-            headers=self.headers
-        )
+        # Headers are sent per request so clients with different keys can share connections
+        self._client = client
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client, resolved to the shared module client on first use."""
+        if self._client is None:
+            self._client = get_client()
+        return self._client
     
     async def __aenter__(self):
         """Async context manager entry."""
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit."""
-        await self.client.aclose()
+        """Async context manager exit. The HTTP client is owned elsewhere and left open."""
     
     async def _prepare_files_and_data(
         self, 
         params: Dict,
         image_path: Optional[str] = None
-    ) -> Tuple[Dict, Dict]:
+    ) -> Tuple[Dict, Dict, Optional[BinaryIO]]:
         """
         Prepare files and data for API request.
         
+        Input images up to _INLINE_UPLOAD_LIMIT are read into memory; larger
+        ones are passed as an open file, which _make_request streams with
+        reads in a worker thread so memory stays constant and the event loop
+        is not blocked by disk IO.
+        
         Args:
             params: Request parameters
             image_path: Optional path to image file for image-to-image
             
         Returns:
-            Tuple[Dict, Dict]: (files, data)
+            Tuple[Dict, Dict, Optional[BinaryIO]]: (files, data, open upload
+            file that the caller must close, or None)
         """
         files = {}
-        data = params.copy()
+        data = params  # Callers build a fresh dict per request; no copy needed
+        upload_file = None
         
         # Handle image file for image-to-image
         if image_path:
@@ -103,33 +347,54 @@ class StabilityClient:
                     error_type="file_error"
                 )
             
-            # Validate it's an image
+            # Open the image off the event loop; only the header is read unless the file is small
             try:
-                with PILImage.open(image_file_path) as img:
-                    img.verify()
-            except Exception as e:
+                header, image_content = await asyncio.to_thread(_open_upload_image, image_file_path)
+            except OSError as e:
                 raise StabilityAPIError(
-                    f"Invalid image file: {image_path}. Error: {e}",
+                    f"Cannot read image file: {image_path}. Error: {e}",
                     error_type="file_error"
                 )
+            if not isinstance(image_content, bytes):
+                upload_file = image_content
             
-            # Add image to files
-            files["image"] = open(image_file_path, "rb")
+            try:
+                # Check the file signature; the API does full validation server-side
+                mime_type = _sniff_image_type(header)
+                if mime_type is None:
+                    raise StabilityAPIError(
+                        f"Invalid image file: {image_path}. Expected a JPEG, PNG or WEBP image.",
+                        error_type="file_error"
+                    )
+                
+                if self.strict_validation:
+                    try:
+                        await asyncio.to_thread(_verify_image, image_content)
+                    except Exception as e:
+                        raise StabilityAPIError(
+                            f"Invalid image file: {image_path}. Error: {e}",
+                            error_type="file_error"
+                        )
+            except BaseException:
+                if upload_file is not None:
+                    upload_file.close()
+                raise
             
-            # Remove image_path from data as it's now in files
-            data.pop("image_path", None)
+            # Add image to files
+            files["image"] = (image_file_path.name, image_content, mime_type)
         
-        # Add empty file if no files (API requirement)
+        # Send an empty file if no files; the API only accepts multipart/form-data
         if not files:
-            files["none"] = ""
+            files = _EMPTY_FILES
         
-        return files, data
+        return files, data, upload_file
     
     async def _make_request(
         self, 
-        endpoint: str, 
+        endpoint: Endpoint, 
         params: Dict,
-        image_path: Optional[str] = None
+        image_path: Optional[str] = None,
+        writer: Optional[BinaryIO] = None
     ) -> GenerationResult:
         """
         Make request to Stability API.
@@ -138,62 +403,78 @@ class StabilityClient:
             endpoint: API endpoint
             params: Request parameters  
             image_path: Optional image file path
+            writer: Optional binary file to stream the image into. When given,
+                the result carries no image_data and no file_path; the caller
+                owns the writer and reports where the image ends up
             
         Returns:
             GenerationResult: Generation result
         """
-        url = f"{self.base_url}{endpoint}"
+        url = f"{self.base_url}{endpoint.value}"
+        upload_file = None
         
         try:
             # Prepare files and data
-            files, data = await self._prepare_files_and_data(params, image_path)
-            
-            logger.info(f"Making request to {url}")
-            logger.info(f"Parameters: {data}")
+            files, data, upload_file = await self._prepare_files_and_data(params, image_path)
             
-            # Make request
-            response = await self.client.post(
-                url,
-                files=files,
-                data=data
-            )
+            logger.info("Making request to %s", url)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Parameters: %s", _loggable_params(data))
             
-            # Close file handles
-            for file_obj in files.values():
-                if hasattr(file_obj, 'close'):
-                    file_obj.close()
+            if upload_file is not None:
+                # Large input images are streamed from disk without blocking the loop
+                filename, _, mime_type = files["image"]
+                content, body_headers = _streaming_multipart(
+                    data, "image", filename, mime_type, upload_file
+                )
+                request_kwargs = {"content": content, "headers": {**self.headers, **body_headers}}
+            else:
+                request_kwargs = {"files": files, "data": data, "headers": self.headers}
             
-            # Handle response
-            if not response.is_success:
-                error_message = f"HTTP {response.status_code}: {response.text}"
+            # Stream the body into a single buffer that is handed out without copying
+            async with self.client.stream("POST", url, **request_kwargs) as response:
+                # Handle response
+                if not response.is_success:
+                    await response.aread()
+                    
+                    # Use a contextual error message where one is known
+                    format_error = _STATUS_MESSAGES.get(response.status_code, _default_status_message)
+                    error_message = format_error(response)
+                    
+                    raise StabilityAPIError(
+                        error_message,
+                        status_code=response.status_code
+                    )
                 
-                # Add contextual error messages
-                if response.status_code == 401:
-                    error_message = "Invalid API key. Please check your STABILITY_API_KEY."
-                elif response.status_code == 402:
-                    error_message = "Insufficient credits. Please check your Stability AI account balance."
-                elif response.status_code == 400:
-                    error_message = f"Bad request: {response.text}. Please check your parameters."
-                elif response.status_code == 429:
-                    error_message = "Rate limit exceeded. Please wait and try again."
+                finish_reason = response.headers.get("finish-reason", "SUCCESS")
+                seed = int(response.headers.get("seed", 0))
                 
-                raise StabilityAPIError(
-                    error_message,
-                    status_code=response.status_code
-                )
-            
-            # Get response data
-            image_data = response.content
-            finish_reason = response.headers.get("finish-reason", "SUCCESS")
-            seed = int(response.headers.get("seed", 0))
-            
-            # Check for content filtering
-            if finish_reason == "CONTENT_FILTERED":
-                raise StabilityAPIError(
-                    "Generated content was filtered due to NSFW detection. "
-                    "Try a different prompt or add negative prompts to avoid restricted content.",
-                    error_type="content_filtered"
-                )
+                # Check for content filtering
+                if finish_reason == "CONTENT_FILTERED":
+                    raise StabilityAPIError(
+                        "Generated content was filtered due to NSFW detection. "
+                        "Try a different prompt or add negative prompts to avoid restricted content.",
+                        error_type="content_filtered"
+                    )
+                
+                # Get response data
+                if writer is not None:
+                    # Write as data arrives instead of holding the whole image; writes are
+                    # batched and run in a worker thread to keep disk IO off the event loop
+                    pending = bytearray()
+                    async for chunk in response.aiter_bytes(_STREAM_CHUNK_SIZE):
+                        pending += chunk
+                        if len(pending) >= _WRITE_BATCH_SIZE:
+                            await asyncio.to_thread(writer.write, pending)
+                            pending.clear()
+                    if pending:
+                        await asyncio.to_thread(writer.write, pending)
+                    image_data = b""
+                else:
+                    buffer = bytearray()
+                    async for chunk in response.aiter_bytes(_STREAM_CHUNK_SIZE):
+                        buffer += chunk
+                    image_data = memoryview(buffer).toreadonly()
             
             return GenerationResult(
                 image_data=image_data,
@@ -211,6 +492,9 @@ class StabilityClient:
             if isinstance(e, StabilityAPIError):
                 raise
             raise StabilityAPIError(f"Unexpected error: {e}")
+        finally:
+            if upload_file is not None:
+                upload_file.close()
     
     async def generate_text_to_image(
         self,
@@ -219,7 +503,8 @@ class StabilityClient:
         aspect_ratio: str = "1:1",
         seed: int = 0,
         output_format: str = "png",
-        negative_prompt: str = ""
+        negative_prompt: str = "",
+        writer: Optional[BinaryIO] = None
     ) -> GenerationResult:
         """
         Generate image from text prompt.
@@ -231,35 +516,21 @@ class StabilityClient:
             seed: Random seed for generation
             output_format: Output image format
             negative_prompt: What to avoid in the image
+            writer: Optional binary file to stream the generated image into
             
         Returns:
             GenerationResult: Generated image result
         """
-        model_enum = get_model_by_name(model)
-        if not model_enum:
+        model_info = get_model_info(model)
+        if model_info is None:
             raise StabilityAPIError(f"Invalid model: {model}")
         
-        model_info = MODEL_INFO[model_enum]
-        endpoint = model_info.endpoint
-        
-        # Build parameters based on model type
-        params = {
-            "prompt": prompt,
-            "aspect_ratio": aspect_ratio,
-            "seed": seed,
-            "output_format": output_format
-        }
-        
-        # Add model for SD3 endpoint
-        if endpoint == "/v2beta/stable-image/generate/sd3":
-            params["model"] = model
-            params["mode"] = "text-to-image"
-        
-        # Add negative prompt if supported and provided
-        if negative_prompt and model_info.supports_negative_prompt:
-            params["negative_prompt"] = negative_prompt
+        build_text_to_image_params, _ = get_param_builders(model)
+        params = build_text_to_image_params(
+            prompt, aspect_ratio, seed, output_format, negative_prompt
+        )
         
-        return await self._make_request(endpoint, params)
+        return await self._make_request(model_info.endpoint, params, writer=writer)
     
     async def generate_image_to_image(
         self,
@@ -269,7 +540,8 @@ class StabilityClient:
         strength: float = 0.7,
         seed: int = 0,
         output_format: str = "png",
-        negative_prompt: str = ""
+        negative_prompt: str = "",
+        writer: Optional[BinaryIO] = None
     ) -> GenerationResult:
         """
         Transform existing image using text prompt.
@@ -282,41 +554,80 @@ class StabilityClient:
             seed: Random seed for generation
             output_format: Output image format
             negative_prompt: What to avoid in the transformation
+            writer: Optional binary file to stream the generated image into
             
         Returns:
             GenerationResult: Generated image result
         """
-        model_enum = get_model_by_name(model)
-        if not model_enum:
+        model_info = get_model_info(model)
+        if model_info is None:
             raise StabilityAPIError(f"Invalid model: {model}")
         
-        model_info = MODEL_INFO[model_enum]
         if not model_info.supports_image_to_image:
             raise StabilityAPIError(f"Model {model} does not support image-to-image generation")
         
-        endpoint = model_info.endpoint
+        _, build_image_to_image_params = get_param_builders(model)
+        params = build_image_to_image_params(
+            prompt, strength, seed, output_format, negative_prompt
+        )
         
-        # Build parameters
-        params = {
-            "prompt": prompt,
-            "seed": seed,
-            "output_format": output_format
-        }
+        return await self._make_request(model_info.endpoint, params, image_path, writer=writer)
+    
+    async def generate_batch(
+        self,
+        items: Sequence[Dict],
+        max_concurrency: int = 8
+    ) -> List[Union[GenerationResult, BaseException]]:
+        """
+        Generate several images concurrently over the same HTTP client.
         
-        # Add strength if supported
-        if model_info.supports_strength:
-            params["strength"] = strength
+        Args:
+            items: Keyword arguments for generate_text_to_image, or for
+                generate_image_to_image when an item contains image_path
+            max_concurrency: Maximum number of requests in flight at once
+            
+        Identical items with a fixed (non-zero) seed produce identical images,
+        so each distinct one is requested once and its result shared.
+        
+        Returns:
+            List: GenerationResult or raised exception for each item, in input order
+        """
+        unique_items: List[Dict] = []
+        unique_index: Dict[Tuple, int] = {}
+        slots: List[int] = []
+        
+        for item in items:
+            key = None
+            index = None
+            # Seed 0 is randomised server-side, so every such item is distinct
+            if item.get("seed", 0):
+                try:
+                    key = tuple(sorted(item.items()))
+                    index = unique_index.get(key)
+                except TypeError:
+                    # Unhashable values can't be deduplicated; the item's own call reports any error
+                    key = None
+            
+            if index is None:
+                index = len(unique_items)
+                unique_items.append(item)
+                if key is not None:
+                    unique_index[key] = index
+            slots.append(index)
         
-        # Add model for SD3 endpoint
-        if endpoint == "/v2beta/stable-image/generate/sd3":
-            params["model"] = model
-            params["mode"] = "image-to-image"
+        semaphore = asyncio.Semaphore(max_concurrency)
         
-        # Add negative prompt if supported and provided
-        if negative_prompt and model_info.supports_negative_prompt:
-            params["negative_prompt"] = negative_prompt
+        async def _generate_one(item: Dict) -> GenerationResult:
+            async with semaphore:
+                if "image_path" in item:
+                    return await self.generate_image_to_image(**item)
+                return await self.generate_text_to_image(**item)
         
-        return await self._make_request(endpoint, params, image_path)
+        results = await asyncio.gather(
+            *(_generate_one(item) for item in unique_items),
+            return_exceptions=True
+        )
+        return [results[index] for index in slots]
 
 
 # Convenience function for single requests
@@ -328,7 +639,9 @@ async def generate_image(
     output_format: str = "png",
     negative_prompt: str = "",
     image_path: Optional[str] = None,
-    strength: float = 0.7
+    strength: float = 0.7,
+    client: Optional[httpx.AsyncClient] = None,
+    writer: Optional[BinaryIO] = None
 ) -> GenerationResult:
     """
     Generate image using Stability AI API.
@@ -342,27 +655,31 @@ async def generate_image(
         negative_prompt: What to avoid
         image_path: Input image for image-to-image (optional)
         strength: Transformation strength for image-to-image
+        client: HTTP client to use. If None, the shared module client is used
+        writer: Optional binary file to stream the generated image into
         
     Returns:
         GenerationResult: Generated image result
     """
-    async with StabilityClient() as client:
-        if image_path:
-            return await client.generate_image_to_image(
-                image_path=image_path,
-                prompt=prompt,
-                model=model,
-                strength=strength,
-                seed=seed,
-                output_format=output_format,
-                negative_prompt=negative_prompt
-            )
-        else:
-            return await client.generate_text_to_image(
-                prompt=prompt,
-                model=model,
-                aspect_ratio=aspect_ratio,
-                seed=seed,
-                output_format=output_format,
-                negative_prompt=negative_prompt
-            )
\ No newline at end of file
+    stability = StabilityClient(client=client)
+    if image_path:
+        return await stability.generate_image_to_image(
+            image_path=image_path,
+            prompt=prompt,
+            model=model,
+            strength=strength,
+            seed=seed,
+            output_format=output_format,
+            negative_prompt=negative_prompt,
+            writer=writer
+        )
+    else:
+        return await stability.generate_text_to_image(
+            prompt=prompt,
+            model=model,
+            aspect_ratio=aspect_ratio,
+            seed=seed,
+            output_format=output_format,
+            negative_prompt=negative_prompt,
+            writer=writer
+        )
\ No newline at end of file
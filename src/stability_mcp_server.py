@@ -12,7 +12,7 @@ import os
 import platform
 import subprocess
 import sys
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 # Configure logging to stderr (MCP requirement)
 logging.basicConfig(
@@ -33,6 +33,8 @@ except ImportError as e:
 
 from .models import (
     StabilityModel, 
+    AspectRatio,
+    OutputFormat,
     get_available_models, 
     get_model_validation_errors,
     DEFAULT_MODEL,
@@ -41,20 +43,43 @@ from .models import (
     DEFAULT_SEED,
     DEFAULT_STRENGTH
 )
-from .stability_client import StabilityClient, StabilityAPIError, generate_image
-from .utils import save_image_with_metadata, get_storage_stats, StorageError
+from .stability_client import (
+    StabilityClient,
+    StabilityAPIError,
+    close_client,
+    generate_image,
+    get_client
+)
+from .utils import ImageStreamWriter, save_image_with_metadata, get_storage_stats, StorageError
+
+
+def _launch_viewer(command: str, image_path: str) -> None:
+    """Start a viewer process without waiting for it to exit."""
+    # Detached from our stdio, which carries the MCP protocol
+    subprocess.Popen(
+        [command, image_path],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
 
 
 def open_image_with_system_viewer(image_path: str) -> bool:
-    """Open image with system default viewer."""
+    """
+    Open image with system default viewer.
+    
+    The viewer is launched fire-and-forget so the tool reply is not delayed;
+    the result only reflects whether the launch itself succeeded.
+    """
     try:
         system = platform.system()
         if system == "Windows":
             os.startfile(image_path)
         elif system == "Darwin":  # macOS
-            subprocess.run(["open", image_path], check=True)
+            _launch_viewer("open", image_path)
         elif system == "Linux":
-            subprocess.run(["xdg-open", image_path], check=True)
+            _launch_viewer("xdg-open", image_path)
         else:
             logger.warning(f"Unknown system {system}, cannot open image viewer")
             return False
@@ -68,109 +93,118 @@ def open_image_with_system_viewer(image_path: str) -> bool:
 app = Server("stability-ai")
 
 
+# Allowed values for the generate_image schema enums, derived from the model enums.
+# Lists rather than tuples since the schema is sent as JSON arrays.
+_MODEL_VALUES: list[str] = [m.value for m in StabilityModel]
+_ASPECT_RATIO_VALUES: list[str] = [r.value for r in AspectRatio]
+_OUTPUT_FORMAT_VALUES: list[str] = [f.value for f in OutputFormat]
+
+
+# Tool definitions are static, so they are built once and reused for every list_tools call
+_TOOLS: list[Tool] = [
+    Tool(
+        name="generate_image",
+        description=(
+            "Generate images using Stability AI models. "
+            "Supports text-to-image and image-to-image generation with 6 different models. "
+            "Core/Ultra models are optimized for natural language prompts. "
+            "SD3.5 models offer more technical control."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "prompt": {
+                    "type": "string",
+                    "description": "Text description of the desired image. For Core/Ultra models, use natural language. For SD3.5 models, detailed technical descriptions work best."
+                },
+                "model": {
+                    "type": "string",
+                    "description": f"Model to use for generation. Default: {DEFAULT_MODEL.value}",
+                    "enum": _MODEL_VALUES,
+                    "default": DEFAULT_MODEL.value
+                },
+                "aspect_ratio": {
+                    "type": "string", 
+                    "description": f"Image aspect ratio. Default: {DEFAULT_ASPECT_RATIO.value}",
+                    "enum": _ASPECT_RATIO_VALUES,
+                    "default": DEFAULT_ASPECT_RATIO.value
+                },
+                "seed": {
+                    "type": "integer",
+                    "description": f"Random seed for reproducible results. Default: {DEFAULT_SEED}",
+                    "minimum": 0,
+                    "maximum": 4294967294,
+                    "default": DEFAULT_SEED
+                },
+                "output_format": {
+                    "type": "string",
+                    "description": f"Output image format. Default: {DEFAULT_OUTPUT_FORMAT.value}",
+                    "enum": _OUTPUT_FORMAT_VALUES,
+                    "default": DEFAULT_OUTPUT_FORMAT.value
+                },
+                "negative_prompt": {
+                    "type": "string",
+                    "description": "What to avoid in the image. Not supported by all models.",
+                    "default": ""
+                },
+                "image_path": {
+                    "type": "string",
+                    "description": "Path to input image for image-to-image generation (optional)",
+                    "default": ""
+                },
+                "strength": {
+                    "type": "number",
+                    "description": f"How much to transform input image (0.0-1.0). Only used for image-to-image. Default: {DEFAULT_STRENGTH}",
+                    "minimum": 0.0,
+                    "maximum": 1.0,
+                    "default": DEFAULT_STRENGTH
+                }
+            },
+            "required": ["prompt"]
+        }
+    ),
+    
+    Tool(
+        name="list_models",
+        description="Get information about available Stability AI models and their capabilities.",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    ),
+    
+    Tool(
+        name="get_storage_info", 
+        description="Get information about the image storage directory and its contents.",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    )
+]
+
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools."""
-    return [
-        Tool(
-            name="generate_image",
-            description=(
-                "Generate images using Stability AI models. "
-                "Supports text-to-image and image-to-image generation with 6 different models. "
-                "Core/Ultra models are optimized for natural language prompts. "
-                "SD3.5 models offer more technical control."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "prompt": {
-                        "type": "string",
-                        "description": "Text description of the desired image. For Core/Ultra models, use natural language. For SD3.5 models, detailed technical descriptions work best."
-                    },
-                    "model": {
-                        "type": "string",
-                        "description": f"Model to use for generation. Default: {DEFAULT_MODEL.value}",
-                        "enum": [model.value for model in StabilityModel],
-                        "default": DEFAULT_MODEL.value
-                    },
-                    "aspect_ratio": {
-                        "type": "string", 
-                        "description": f"Image aspect ratio. Default: {DEFAULT_ASPECT_RATIO.value}",
-                        "enum": ["1:1", "16:9", "9:16", "21:9", "9:21", "3:2", "2:3", "5:4", "4:5", "4:3", "3:4"],
-                        "default": DEFAULT_ASPECT_RATIO.value
-                    },
-                    "seed": {
-                        "type": "integer",
-                        "description": f"Random seed for reproducible results. Default: {DEFAULT_SEED}",
-                        "minimum": 0,
-                        "maximum": 4294967294,
-                        "default": DEFAULT_SEED
-                    },
-                    "output_format": {
-                        "type": "string",
-                        "description": f"Output image format. Default: {DEFAULT_OUTPUT_FORMAT.value}",
-                        "enum": ["png", "jpeg"],
-                        "default": DEFAULT_OUTPUT_FORMAT.value
-                    },
-                    "negative_prompt": {
-                        "type": "string",
-                        "description": "What to avoid in the image. Not supported by all models.",
-                        "default": ""
-                    },
-                    "image_path": {
-                        "type": "string",
-                        "description": "Path to input image for image-to-image generation (optional)",
-                        "default": ""
-                    },
-                    "strength": {
-                        "type": "number",
-                        "description": f"How much to transform input image (0.0-1.0). Only used for image-to-image. Default: {DEFAULT_STRENGTH}",
-                        "minimum": 0.0,
-                        "maximum": 1.0,
-                        "default": DEFAULT_STRENGTH
-                    }
-                },
-                "required": ["prompt"]
-            }
-        ),
-        
-        Tool(
-            name="list_models",
-            description="Get information about available Stability AI models and their capabilities.",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": []
-            }
-        ),
-        
-        Tool(
-            name="get_storage_info", 
-            description="Get information about the image storage directory and its contents.",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": []
-            }
-        )
-    ]
+    return _TOOLS
 
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
-    """Handle tool calls."""
+    """
+    Handle tool calls.
     
-    if name == "generate_image":
-        return await handle_generate_image(arguments)
-    
-    elif name == "list_models":
-        return await handle_list_models(arguments)
-    
-    elif name == "get_storage_info":
-        return await handle_get_storage_info(arguments)
-    
-    else:
+    Tools have no intermediate progress to report, so results are returned
+    directly and no progress notifications are sent, even when the client
+    supplies a progressToken.
+    """
+    handler = _TOOL_HANDLERS.get(name)
+    if handler is None:
         raise ValueError(f"Unknown tool: {name}")
+    return await handler(arguments)
 
 
 async def handle_generate_image(arguments: dict) -> list[TextContent]:
@@ -202,7 +236,7 @@ async def handle_generate_image(arguments: dict) -> list[TextContent]:
         )
         
         if validation_errors:
-            error_message = "Parameter validation failed:\n" + "\n".join(f"• {error}" for error in validation_errors)
+            error_message = "Parameter validation failed:\n• " + "\n• ".join(validation_errors)
             return [TextContent(
                 type="text",
                 text=error_message
@@ -212,62 +246,69 @@ async def handle_generate_image(arguments: dict) -> list[TextContent]:
         logger.info(f"Generating image with model {model}")
         logger.info(f"Prompt: {prompt[:100]}...")
         
-        result = await generate_image(
-            prompt=prompt,
-            model=model,
-            aspect_ratio=aspect_ratio,
-            seed=seed,
-            output_format=output_format,
-            negative_prompt=negative_prompt,
-            image_path=image_path,
-            strength=strength
-        )
-        
-        # Prepare metadata
-        metadata = {
-            "prompt": prompt,
-            "model": model,
-            "aspect_ratio": aspect_ratio,
-            "seed": result.seed,
-            "output_format": output_format,
-            "negative_prompt": negative_prompt,
-            "finish_reason": result.finish_reason,
-            "generation_type": "image-to-image" if image_path else "text-to-image"
-        }
-        
-        if image_path:
-            metadata["input_image_path"] = image_path
-            metadata["strength"] = strength
-        
-        # Save image and metadata to disk
-        try:
-            image_file_path, metadata_file_path = save_image_with_metadata(
-                result.image_data, 
-                metadata
+        # Stream the image to a temporary file in storage instead of holding it in memory
+        with ImageStreamWriter() as image_writer:
+            result = await generate_image(
+                prompt=prompt,
+                model=model,
+                aspect_ratio=aspect_ratio,
+                seed=seed,
+                output_format=output_format,
+                negative_prompt=negative_prompt,
+                image_path=image_path,
+                strength=strength,
+                writer=image_writer
             )
             
-            # Try to open the image with system viewer
-            viewer_opened = open_image_with_system_viewer(image_file_path)
-            viewer_status = "🖼️ Opened in system image viewer" if viewer_opened else "📁 Saved to disk"
-            
-            success_message = (
-                f"✅ Image generated successfully!\n\n"
-                f"**Model:** {model}\n"
-                f"**Type:** {'Image-to-image' if image_path else 'Text-to-image'}\n"
-                f"**Seed:** {result.seed}\n" 
-                f"**Format:** {output_format}\n"
-                f"**File:** {image_file_path}\n"
-                f"**Status:** {viewer_status}\n\n"
-                f"The image has been saved and should open automatically in your default image viewer."
-            )
+            # Prepare metadata
+            metadata = {
+                "prompt": prompt,
+                "model": model,
+                "aspect_ratio": aspect_ratio,
+                "seed": result.seed,
+                "output_format": output_format,
+                "negative_prompt": negative_prompt,
+                "finish_reason": result.finish_reason,
+                "generation_type": "image-to-image" if image_path else "text-to-image"
+            }
             
-            return [TextContent(type="text", text=success_message)]
+            if image_path:
+                metadata["input_image_path"] = image_path
+                metadata["strength"] = strength
             
-        except StorageError as e:
-            return [TextContent(
-                type="text", 
-                text=f"❌ Image generated but failed to save: {e}"
-            )]
+            # Save image and metadata to disk
+            try:
+                image_file_path, metadata_file_path = await save_image_with_metadata(
+                    image_writer, 
+                    metadata
+                )
+                
+                # Try to open the image with system viewer
+                viewer_opened = open_image_with_system_viewer(image_file_path)
+                viewer_status = "🖼️ Opened in system image viewer" if viewer_opened else "📁 Saved to disk"
+                
+                success_message = (
+                    f"✅ Image generated successfully!\n\n"
+                    f"**Model:** {model}\n"
+                    f"**Type:** {'Image-to-image' if image_path else 'Text-to-image'}\n"
+                    f"**Seed:** {result.seed}\n" 
+                    f"**Format:** {output_format}\n"
+                    f"**File:** {image_file_path}\n"
+                    f"**Status:** {viewer_status}\n\n"
+                    f"The image has been saved and should open automatically in your default image viewer."
+                )
+                
+                return [TextContent(type="text", text=success_message)]
+                
+            except StorageError as e:
+                return [TextContent(
+                    type="text", 
+                    text=f"❌ Image generated but failed to save: {e}"
+                )]
+    
+    except StorageError as e:
+        logger.error(f"Storage error: {e}")
+        return [TextContent(type="text", text=f"❌ **Storage Error:** {e}")]
     
     except StabilityAPIError as e:
         logger.error(f"Stability API error: {e.message}")
@@ -293,54 +334,55 @@ async def handle_generate_image(arguments: dict) -> list[TextContent]:
         )]
 
 
+def _build_list_models_response() -> str:
+    """Build the list_models tool response text."""
+    models = get_available_models()
+    
+    response = "**Available Stability AI Models:**\n\n"
+    
+    # Group models by type
+    core_ultra = []
+    sd3_5_models = []
+    
+    for model_id, description in models.items():
+        if "stable-image-" in model_id:
+            core_ultra.append((model_id, description))
+        else:
+            sd3_5_models.append((model_id, description))
+    
+    # Display Core/Ultra models first (recommended)
+    if core_ultra:
+        response += "**🚀 Core/Ultra Models (Recommended):**\n"
+        for model_id, description in core_ultra:
+            default_marker = " ⭐ (Default)" if model_id == DEFAULT_MODEL.value else ""
+            response += f"• **{model_id}**{default_marker}: {description}\n"
+        response += "\n"
+    
+    # Display SD3.5 models
+    if sd3_5_models:
+        response += "**🔧 SD3.5 Family Models:**\n"
+        for model_id, description in sd3_5_models:
+            response += f"• **{model_id}**: {description}\n"
+    
+    response += (
+        "\n**Usage Tips:**\n"
+        "• Core/Ultra models work best with natural language prompts\n"
+        "• SD3.5 models offer more technical control and detailed parameters\n"
+        "• Use `stable-image-core` for fast, cost-effective generation\n"
+        "• Use `stable-image-ultra` for highest quality results\n"
+        "• Use `sd3.5-flash` for rapid iteration and previews"
+    )
+    
+    return response
+
+
+# Model information is static, so the list_models response is built once
+_LIST_MODELS_RESPONSE = _build_list_models_response()
+
+
 async def handle_list_models(arguments: dict) -> list[TextContent]:
     """Handle list models requests."""
-    try:
-        models = get_available_models()
-        
-        response = "**Available Stability AI Models:**\n\n"
-        
-        # Group models by type
-        core_ultra = []
-        sd3_5_models = []
-        
-        for model_id, description in models.items():
-            if "stable-image-" in model_id:
-                core_ultra.append((model_id, description))
-            else:
-                sd3_5_models.append((model_id, description))
-        
-        # Display Core/Ultra models first (recommended)
-        if core_ultra:
-            response += "**🚀 Core/Ultra Models (Recommended):**\n"
-            for model_id, description in core_ultra:
-                default_marker = " ⭐ (Default)" if model_id == DEFAULT_MODEL.value else ""
-                response += f"• **{model_id}**{default_marker}: {description}\n"
-            response += "\n"
-        
-        # Display SD3.5 models
-        if sd3_5_models:
-            response += "**🔧 SD3.5 Family Models:**\n"
-            for model_id, description in sd3_5_models:
-                response += f"• **{model_id}**: {description}\n"
-        
-        response += (
-            "\n**Usage Tips:**\n"
-            "• Core/Ultra models work best with natural language prompts\n"
-            "• SD3.5 models offer more technical control and detailed parameters\n"
-            "• Use `stable-image-core` for fast, cost-effective generation\n"
-            "• Use `stable-image-ultra` for highest quality results\n"
-            "• Use `sd3.5-flash` for rapid iteration and previews"
-        )
-        
-        return [TextContent(type="text", text=response)]
-    
-    except Exception as e:
-        logger.error(f"Error listing models: {e}")
-        return [TextContent(
-            type="text", 
-            text=f"❌ Error retrieving model information: {e}"
-        )]
+    return [TextContent(type="text", text=_LIST_MODELS_RESPONSE)]
 
 
 async def handle_get_storage_info(arguments: dict) -> list[TextContent]:
@@ -374,6 +416,14 @@ async def handle_get_storage_info(arguments: dict) -> list[TextContent]:
         )]
 
 
+# Tool name -> handler, used by call_tool for dispatch
+_TOOL_HANDLERS: dict[str, Callable[[dict], Awaitable[list[TextContent]]]] = {
+    "generate_image": handle_generate_image,
+    "list_models": handle_list_models,
+    "get_storage_info": handle_get_storage_info,
+}
+
+
 async def main():
     """Main server entry point."""
     # Validate API key on startup
@@ -395,13 +445,19 @@ async def main():
         logger.error(f"Storage configuration error: {e}")
         sys.exit(1)
     
+    # Create the pooled HTTP client up front; every tool call reuses its connections
+    get_client()
+    
     # Run server
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(
-            read_stream,
-            write_stream,
-            app.create_initialization_options()
-        )
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(
+                read_stream,
+                write_stream,
+                app.create_initialization_options()
+            )
+    finally:
+        await close_client()
 
 
 def main_sync():
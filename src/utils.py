@@ -2,15 +2,20 @@
 Utility functions for image handling and file storage.
 """
 
+import asyncio
 import base64
-import json
+import hashlib
+import heapq
 import os
 import logging
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Tuple
-from PIL import Image as PILImage
-import io
+from typing import Dict, Optional, Tuple, Union
+import orjson
 
 
 # Configure logging to stderr only (MCP requirement)
@@ -27,16 +32,87 @@ class StorageError(Exception):
     pass
 
 
+@dataclass(slots=True)
+class StorageStats:
+    """Running file counts and sizes for the storage directory."""
+    total_files: int = 0
+    total_size: int = 0
+    image_files: int = 0
+    metadata_files: int = 0
+    
+    def add(self, image_size: int, metadata_size: int) -> None:
+        """Record a saved image and its metadata file."""
+        self.total_files += 2
+        self.total_size += image_size + metadata_size
+        self.image_files += 1
+        self.metadata_files += 1
+    
+    def add_metadata(self, metadata_size: int) -> None:
+        """Record a metadata file saved for an already stored image."""
+        self.total_files += 1
+        self.total_size += metadata_size
+        self.metadata_files += 1
+    
+    def remove_image(self, image_size: int) -> None:
+        """Record a removed image file."""
+        self.total_files -= 1
+        self.total_size -= image_size
+        self.image_files -= 1
+    
+    def remove_metadata(self, metadata_size: int) -> None:
+        """Record a removed metadata file."""
+        self.total_files -= 1
+        self.total_size -= metadata_size
+        self.metadata_files -= 1
+
+
+# Resolved storage directory, cached after the first successful get_storage_path() call
+_storage_path: Optional[Path] = None
+
+# Saved image file names keyed by the content digest embedded in them, loaded on first save
+_image_index: Optional[Dict[str, str]] = None
+
+# Running storage statistics, initialised by one directory scan on first use and then
+# updated by saves and cleanups. The lock is a threading.Lock because the stats are
+# also touched from the synchronous cleanup and stats functions.
+_storage_stats: Optional[StorageStats] = None
+_storage_stats_lock = threading.Lock()
+
+# Number of hex digest characters embedded in generated file names
+_DIGEST_NAME_LENGTH = 12
+
+# Lowercase file extensions recognised when scanning the storage directory
+_IMAGE_EXTS = frozenset({'.png', '.jpg', '.jpeg'})
+_META_EXT = '.json'
+
+
+def invalidate_storage_path_cache() -> None:
+    """Forget the cached storage path so the next lookup re-reads the configuration."""
+    global _storage_path, _image_index, _storage_stats
+    _storage_path = None
+    _image_index = None
+    with _storage_stats_lock:
+        _storage_stats = None
+
+
 def get_storage_path() -> Path:
     """
     Get the configured image storage path from environment variable.
     
+    The directory is created once; later calls return the cached path until
+    invalidate_storage_path_cache() is called. Write permission is not probed
+    here; a failing write raises StorageError when an image is saved.
+    
     Returns:
         Path: The storage directory path
         
     Raises:
         StorageError: If path is invalid or cannot be created
     """
+    global _storage_path
+    if _storage_path is not None:
+        return _storage_path
+    
     # Get path from environment variable
     storage_path_env = os.getenv("IMAGE_STORAGE_PATH")
     
@@ -53,17 +129,6 @@ def get_storage_path() -> Path:
     try:
         # Create directory if it doesn't exist
         storage_path.mkdir(parents=True, exist_ok=True)
-        
-        # Test write permissions
-        test_file = storage_path / ".write_test"
-        try:
-            test_file.touch()
-            test_file.unlink()  # Remove test file
-        except PermissionError:
-            raise StorageError(
-                f"No write permission for storage directory: {storage_path}. "
-                f"Please check directory permissions or choose a different path."
-            )
     
     except OSError as e:
         raise StorageError(
@@ -71,10 +136,22 @@ def get_storage_path() -> Path:
             f"Error: {e}. Please check the IMAGE_STORAGE_PATH configuration."
         )
     
+    _storage_path = storage_path
     return storage_path
 
 
-def generate_filename(seed: int, output_format: str, prefix: str = "stability") -> str:
+def _file_extension(name: str) -> str:
+    """Get the lowercase extension (including the dot) of a file name, or ''."""
+    dot = name.rfind('.')
+    return name[dot:].lower() if dot > 0 else ''
+
+
+def generate_filename(
+    seed: int, 
+    output_format: str, 
+    prefix: str = "stability", 
+    digest: Optional[str] = None
+) -> str:
     """
     Generate a unique filename for the image.
     
@@ -82,24 +159,151 @@ def generate_filename(seed: int, output_format: str, prefix: str = "stability")
         seed: The seed used for generation
         output_format: File format (png, jpeg)
         prefix: Filename prefix
+        digest: Optional hex content digest; its prefix is appended to the name
         
     Returns:
         str: Generated filename
     """
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Nanosecond timestamp: cheaper than strftime and unique within the same second
+    timestamp = time.time_ns()
+    if digest:
+        return f"{prefix}_{timestamp}_{seed}_{digest[:_DIGEST_NAME_LENGTH]}.{output_format}"
     return f"{prefix}_{timestamp}_{seed}.{output_format}"
 
 
-def save_image_with_metadata(
-    image_data: bytes, 
+def _digest_from_filename(name: str) -> Optional[str]:
+    """Extract the content digest prefix from a generated file name, if present."""
+    stem = name[:name.rfind('.')] if '.' in name else name
+    candidate = stem.rpartition('_')[2]
+    if len(candidate) != _DIGEST_NAME_LENGTH:
+        return None
+    try:
+        int(candidate, 16)
+    except ValueError:
+        return None
+    return candidate
+
+
+def _get_image_index(storage_path: Path) -> Dict[str, str]:
+    """
+    Get the digest -> file name index for the storage directory.
+    
+    The directory is scanned once; later saves keep the index up to date.
+    """
+    global _image_index
+    if _image_index is None:
+        index = {}
+        with os.scandir(storage_path) as entries:
+            for entry in entries:
+                if entry.is_file() and _file_extension(entry.name) in _IMAGE_EXTS:
+                    digest = _digest_from_filename(entry.name)
+                    if digest:
+                        index[digest] = entry.name
+        _image_index = index
+    return _image_index
+
+
+class ImageStreamWriter:
+    """
+    Binary writer that streams a generated image into a temporary file in the
+    storage directory. save_image_with_metadata() moves it into place; on exit
+    the temporary file is removed if it was never saved.
+    """
+    
+    def __init__(self):
+        storage_path = get_storage_path()
+        try:
+            self._file = tempfile.NamedTemporaryFile(
+                dir=storage_path, prefix=".", suffix=".part", delete=False
+            )
+        except PermissionError as e:
+            raise StorageError(
+                f"No write permission for storage directory: {storage_path}. "
+                f"Please check directory permissions or choose a different path."
+            ) from e
+        except OSError as e:
+            raise StorageError(f"Cannot create temporary image file in {storage_path}: {e}")
+        self.name = self._file.name
+        self.size = 0
+        self._hash = hashlib.blake2b(digest_size=16)
+    
+    def write(self, data: Union[bytes, memoryview]) -> int:
+        """Write a chunk of image data."""
+        written = self._file.write(data)
+        self._hash.update(data)
+        self.size += written
+        return written
+    
+    def hexdigest(self) -> str:
+        """Get the BLAKE2b digest of the data written so far."""
+        return self._hash.hexdigest()
+    
+    def close(self) -> None:
+        """Flush and close the temporary file."""
+        self._file.close()
+    
+    def discard(self) -> None:
+        """Close the temporary file and remove it unless it was moved into place."""
+        self._file.close()
+        try:
+            os.unlink(self.name)
+        except FileNotFoundError:
+            pass
+    
+    def __enter__(self) -> "ImageStreamWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.discard()
+
+
+def _write_image_file(image_path: Path, image_data: Union[bytes, memoryview]) -> None:
+    """Write image bytes to disk (blocking; run in a worker thread)."""
+    image_path.write_bytes(image_data)
+
+
+def _existing_file_sizes(*paths: Path) -> Tuple[Optional[int], ...]:
+    """Get the size of each path, or None where no file exists (blocking; run in a worker thread)."""
+    sizes = []
+    for path in paths:
+        try:
+            sizes.append(path.stat().st_size)
+        except FileNotFoundError:
+            sizes.append(None)
+    return tuple(sizes)
+
+
+def _write_metadata_file(metadata_path: Path, metadata: Dict) -> int:
+    """
+    Write metadata JSON to disk, creating its directory (blocking; run in a worker thread).
+    
+    Returns:
+        int: Number of bytes written
+    """
+    metadata_path.parent.mkdir(exist_ok=True)
+    return metadata_path.write_bytes(
+        orjson.dumps(metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    )
+
+
+async def save_image_with_metadata(
+    image_data: Union[bytes, memoryview, ImageStreamWriter], 
     metadata: Dict, 
     filename: Optional[str] = None
 ) -> Tuple[str, str]:
     """
     Save image and its metadata to the configured storage directory.
     
+    Both files are written concurrently in worker threads so the event loop
+    is not blocked by disk IO. Generated file names embed a content digest;
+    if an image with identical bytes is already stored, the existing image
+    file is kept instead of adding a copy, and its metadata is only written
+    if missing. A streamed image has already been downloaded into its
+    temporary file by then, so this saves disk space rather than transfer.
+    
     Args:
-        image_data: Raw image bytes
+        image_data: Raw image bytes, a read-only view over them, or an
+            ImageStreamWriter the image was already streamed into
         metadata: Generation metadata (seed, model, prompt, etc.)
         filename: Optional custom filename
         
@@ -109,49 +313,139 @@ def save_image_with_metadata(
     Raises:
         StorageError: If saving fails
     """
+    global _storage_stats
     try:
         storage_path = get_storage_path()
+        metadata_dir = storage_path / "metadata"
         
         # Generate filename if not provided
+        digest = None
+        image_path = None
         if not filename:
-            seed = metadata.get('seed', 0)
-            output_format = metadata.get('output_format', 'png')
-            filename = generate_filename(seed, output_format)
-        
-        # Save image
-        image_path = storage_path / filename
-        with open(image_path, 'wb') as f:
-            f.write(image_data)
+            if isinstance(image_data, ImageStreamWriter):
+                digest = image_data.hexdigest()
+            else:
+                digest = hashlib.blake2b(image_data, digest_size=16).hexdigest()
+            digest = digest[:_DIGEST_NAME_LENGTH]
+            
+            # Identical bytes were already saved; reuse that file
+            image_index = _get_image_index(storage_path)
+            existing_name = image_index.get(digest)
+            if existing_name and (storage_path / existing_name).exists():
+                image_path = storage_path / existing_name
+            else:
+                seed = metadata.get('seed', 0)
+                output_format = metadata.get('output_format', 'png')
+                filename = generate_filename(seed, output_format, digest=digest)
         
-        # Create metadata subdirectory if it doesn't exist
-        metadata_dir = storage_path / "metadata"
-        metadata_dir.mkdir(exist_ok=True)
+        reuse_image = image_path is not None
+        if not reuse_image:
+            image_path = storage_path / filename
         
         # Save metadata in the metadata subfolder
         metadata_filename = f"{image_path.stem}_metadata.json"
         metadata_path = metadata_dir / metadata_filename
         
+        if reuse_image and metadata_path.exists():
+            logger.info(f"Image already stored, skipping write: {image_path}")
+            return str(image_path), str(metadata_path)
+        
+        if isinstance(image_data, ImageStreamWriter):
+            file_size = image_data.size
+        else:
+            file_size = len(image_data)
+        
         # Add file info to metadata
         enhanced_metadata = {
             **metadata,
             "file_path": str(image_path),
-            "file_size": len(image_data),
+            "file_size": file_size,
             "generated_at": datetime.now().isoformat(),
             "storage_directory": str(storage_path)
         }
         
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(enhanced_metadata, f, indent=2, ensure_ascii=False)
+        # Totals the writes below will be applied to; if a first scan replaces them while
+        # the writes are in flight, that scan may already include the new files
+        with _storage_stats_lock:
+            stats_before = _storage_stats
+        
+        # Files about to be overwritten (e.g. an explicit filename) must not be counted twice
+        if reuse_image:
+            old_image_size, old_metadata_size = None, None
+        else:
+            old_image_size, old_metadata_size = await asyncio.to_thread(
+                _existing_file_sizes, image_path, metadata_path
+            )
+        
+        try:
+            if reuse_image:
+                # Image file already stored; only its missing metadata is written
+                metadata_size = await asyncio.to_thread(
+                    _write_metadata_file, metadata_path, enhanced_metadata
+                )
+            else:
+                # Streamed images are already on disk and only need renaming
+                if isinstance(image_data, ImageStreamWriter):
+                    image_data.close()
+                    save_image = asyncio.to_thread(os.replace, image_data.name, image_path)
+                else:
+                    save_image = asyncio.to_thread(_write_image_file, image_path, image_data)
+                
+                _, metadata_size = await asyncio.gather(
+                    save_image,
+                    asyncio.to_thread(_write_metadata_file, metadata_path, enhanced_metadata)
+                )
+        except PermissionError as e:
+            raise StorageError(
+                f"No write permission for storage directory: {storage_path}. "
+                f"Please check directory permissions or choose a different path."
+            ) from e
+        
+        # Before the first scan there is nothing to update; the scan will count these files.
+        # If the totals were replaced meanwhile, drop them so the next lookup rescans.
+        with _storage_stats_lock:
+            if _storage_stats is not stats_before:
+                _storage_stats = None
+            elif _storage_stats is not None:
+                if old_image_size is not None:
+                    _storage_stats.remove_image(old_image_size)
+                if old_metadata_size is not None:
+                    _storage_stats.remove_metadata(old_metadata_size)
+                if reuse_image:
+                    _storage_stats.add_metadata(metadata_size)
+                else:
+                    _storage_stats.add(file_size, metadata_size)
+        
+        if digest and not reuse_image:
+            image_index[digest] = filename
         
         logger.info(f"Saved image: {image_path}")
         logger.info(f"Saved metadata: {metadata_path}")
         
         return str(image_path), str(metadata_path)
     
+    except StorageError:
+        raise
     except Exception as e:
         raise StorageError(f"Failed to save image and metadata: {e}")
 
 
+def encode_bytes_to_base64(data: Union[bytes, memoryview]) -> str:
+    """
+    Encode in-memory image bytes to base64 string.
+    
+    Use this instead of encode_image_to_base64 when the image bytes are
+    still at hand, to avoid reading the saved file back from disk.
+    
+    Args:
+        data: Raw image bytes
+        
+    Returns:
+        str: Base64 encoded image
+    """
+    return base64.b64encode(data).decode('ascii')
+
+
 def encode_image_to_base64(image_path: str) -> str:
     """
     Encode image file to base64 string.
@@ -166,9 +460,7 @@ def encode_image_to_base64(image_path: str) -> str:
         StorageError: If encoding fails
     """
     try:
-        with open(image_path, 'rb') as f:
-            image_data = f.read()
-        return base64.b64encode(image_data).decode('utf-8')
+        return encode_bytes_to_base64(Path(image_path).read_bytes())
     except Exception as e:
         raise StorageError(f"Failed to encode image to base64: {e}")
 
@@ -185,9 +477,7 @@ def decode_base64_to_image(base64_data: str, output_path: str) -> None:
         StorageError: If decoding fails
     """
     try:
-        image_data = base64.b64decode(base64_data)
-        with open(output_path, 'wb') as f:
-            f.write(image_data)
+        Path(output_path).write_bytes(base64.b64decode(base64_data))
     except Exception as e:
         raise StorageError(f"Failed to decode base64 to image: {e}")
 
@@ -202,23 +492,16 @@ def validate_image_file(image_path: str) -> bool:
     Returns:
         bool: True if valid image, False otherwise
     """
-    try:
-        path = Path(image_path)
-        if not path.exists():
-            return False
-        
-        # Try to open with PIL to validate
-        with PILImage.open(path) as img:
-            img.verify()
-        return True
-    except Exception:
-        return False
+    return get_image_info(image_path) is not None
 
 
 def get_image_info(image_path: str) -> Optional[Dict]:
     """
     Get basic information about an image file.
     
+    The file is opened once: decoding it validates the image and the
+    header fields are read from the same handle.
+    
     Args:
         image_path: Path to the image file
         
@@ -226,10 +509,11 @@ def get_image_info(image_path: str) -> Optional[Dict]:
         Dict: Image information or None if invalid
     """
     try:
-        if not validate_image_file(image_path):
-            return None
+        # Pillow is only needed here, so it is imported on first use
+        from PIL import Image as PILImage
         
         with PILImage.open(image_path) as img:
+            img.load()
             return {
                 "format": img.format,
                 "mode": img.mode,
@@ -254,27 +538,39 @@ def cleanup_storage_directory(max_files: int = 1000) -> int:
     try:
         storage_path = get_storage_path()
         
-        # Get all image files sorted by modification time (oldest first)
+        # Collect (mtime, name, size) for every image file
         image_files = []
-        for file_path in storage_path.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in ['.png', '.jpg', '.jpeg']:
-                image_files.append(file_path)
-        
-        image_files.sort(key=lambda f: f.stat().st_mtime)
+        with os.scandir(storage_path) as entries:
+            for entry in entries:
+                if entry.is_file() and _file_extension(entry.name) in _IMAGE_EXTS:
+                    stat = entry.stat()
+                    image_files.append((stat.st_mtime, entry.name, stat.st_size))
         
-        # Remove oldest files if over limit
+        # Remove oldest files if over limit; only those need ordering, not the whole list
         files_to_remove = len(image_files) - max_files
         if files_to_remove > 0:
             removed_count = 0
-            for file_path in image_files[:files_to_remove]:
+            metadata_dir = storage_path / "metadata"
+            for _, name, size in heapq.nsmallest(files_to_remove, image_files):
+                file_path = storage_path / name
                 try:
                     # Remove image file
                     file_path.unlink()
+                    with _storage_stats_lock:
+                        if _storage_stats is not None:
+                            _storage_stats.remove_image(size)
                     
                     # Remove associated metadata file if exists
-                    metadata_path = storage_path / f"{file_path.stem}_metadata.json"
-                    if metadata_path.exists():
+                    metadata_path = metadata_dir / f"{file_path.stem}_metadata.json"
+                    try:
+                        metadata_size = metadata_path.stat().st_size
                         metadata_path.unlink()
+                    except FileNotFoundError:
+                        pass
+                    else:
+                        with _storage_stats_lock:
+                            if _storage_stats is not None:
+                                _storage_stats.remove_metadata(metadata_size)
                     
                     removed_count += 1
                     logger.info(f"Removed old file: {file_path}")
@@ -291,40 +587,64 @@ def cleanup_storage_directory(max_files: int = 1000) -> int:
         return 0
 
 
+def _scan_storage_stats(storage_path: Path) -> StorageStats:
+    """Count files and sizes in the storage directory with a full scan."""
+    stats = StorageStats()
+    
+    # Count files in main directory; scandir entries carry their own stat data.
+    # In-flight ImageStreamWriter temp files (hidden .part files) are not counted.
+    with os.scandir(storage_path) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith('.') and name.endswith('.part'):
+                continue
+            if entry.is_file():
+                stats.total_files += 1
+                stats.total_size += entry.stat().st_size
+                
+                if _file_extension(entry.name) in _IMAGE_EXTS:
+                    stats.image_files += 1
+    
+    # Count metadata files in metadata subdirectory
+    metadata_dir = storage_path / "metadata"
+    try:
+        with os.scandir(metadata_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stats.total_files += 1
+                    stats.total_size += entry.stat().st_size
+                    
+                    if _file_extension(entry.name) == _META_EXT:
+                        stats.metadata_files += 1
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    
+    return stats
+
+
 def get_storage_stats() -> Dict:
     """
     Get statistics about the storage directory.
     
+    The directory is scanned once; afterwards the running totals kept up to
+    date by save_image_with_metadata() and cleanup_storage_directory() are
+    returned without touching the disk.
+    
     Returns:
         Dict: Storage statistics
     """
+    global _storage_stats
     try:
         storage_path = get_storage_path()
         
-        total_files = 0
-        total_size = 0
-        image_files = 0
-        metadata_files = 0
-        
-        # Count files in main directory
-        for file_path in storage_path.iterdir():
-            if file_path.is_file():
-                total_files += 1
-                total_size += file_path.stat().st_size
-                
-                if file_path.suffix.lower() in ['.png', '.jpg', '.jpeg']:
-                    image_files += 1
-        
-        # Count metadata files in metadata subdirectory
-        metadata_dir = storage_path / "metadata"
-        if metadata_dir.exists() and metadata_dir.is_dir():
-            for file_path in metadata_dir.iterdir():
-                if file_path.is_file():
-                    total_files += 1
-                    total_size += file_path.stat().st_size
-                    
-                    if file_path.suffix.lower() == '.json':
-                        metadata_files += 1
+        with _storage_stats_lock:
+            if _storage_stats is None:
+                _storage_stats = _scan_storage_stats(storage_path)
+            stats = _storage_stats
+            total_files = stats.total_files
+            total_size = stats.total_size
+            image_files = stats.image_files
+            metadata_files = stats.metadata_files
         
         return {
             "storage_path": str(storage_path),